@@ -2,14 +2,69 @@ import json
 import pandas as pd
 import sqlite3
 import io
+import os
 import re
-from typing import Dict, Any, List
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from pandas.api import types as ptypes
 from .sql_security import (
     execute_query_safely,
+    escape_identifier,
     validate_identifier,
     SQLSecurityError
 )
 
+# Rows per pandas CSV chunk when streaming uploads
+_CSV_CHUNK_ROWS = 100_000
+
+# Upload database and the per-thread connection reused across uploads. The
+# async upload endpoint runs on the event loop thread, so in the server this
+# is a single long-lived connection.
+_DATABASE_PATH = "db/database.db"
+_conn_local = threading.local()
+
+# PRAGMAs applied only for the duration of a bulk load
+_BULK_PRAGMAS = {
+    'temp_store': 2,  # MEMORY
+    'cache_size': -262144,  # 256 MiB
+    'mmap_size': 268435456,  # 256 MiB
+}
+
+# Characters not allowed in table names
+_INVALID_TABLE_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+# Characters in column names that are replaced with underscores
+_COLUMN_NAME_TRANSLATION = str.maketrans({' ': '_', '-': '_'})
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the stdlib parser
+    orjson = None
+
+def _loads_json(content: bytes) -> Any:
+    """
+    Parse JSON bytes with orjson, falling back to the standard library json
+    module when orjson is unavailable or rejects input json accepts (e.g. NaN)
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content.decode('utf-8'))
+
+def _iter_csv_chunks(csv_content: bytes) -> Iterator[pd.DataFrame]:
+    """
+    Parse CSV bytes into a stream of DataFrames in row chunks so the whole
+    file is never held as a single frame. Each chunk infers its own dtypes;
+    the table's column types come from the first chunk and SQLite's type
+    affinity stores later values that do not fit them as-is.
+    """
+    with pd.read_csv(io.BytesIO(csv_content), chunksize=_CSV_CHUNK_ROWS) as chunks:
+        yield from chunks
+
+@lru_cache(maxsize=1024)
 def sanitize_table_name(table_name: str) -> str:
     """
     Sanitize table name for SQLite by removing/replacing bad characters
@@ -20,7 +75,7 @@ def sanitize_table_name(table_name: str) -> str:
         table_name = table_name.rsplit('.', 1)[0]
     
     # Replace bad characters with underscores
-    sanitized = re.sub(r'[^a-zA-Z0-9_]', '_', table_name)
+    sanitized = _INVALID_TABLE_NAME_CHARS.sub('_', table_name)
     
     # Ensure it starts with a letter or underscore
     if sanitized and not sanitized[0].isalpha() and sanitized[0] != '_':
@@ -39,6 +94,237 @@ def sanitize_table_name(table_name: str) -> str:
     
     return sanitized
 
+def _clean_column_names(columns: pd.Index) -> List[str]:
+    """
+    Lowercase column names and replace spaces and hyphens with underscores
+    """
+    return [col.lower().translate(_COLUMN_NAME_TRANSLATION) for col in columns]
+
+def _sqlite_type(dtype) -> str:
+    """
+    Map a pandas dtype to the SQLite column type pandas.to_sql would use
+    """
+    if ptypes.is_bool_dtype(dtype):
+        return 'INTEGER'
+    if ptypes.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    if ptypes.is_integer_dtype(dtype) or ptypes.is_timedelta64_dtype(dtype):
+        return 'INTEGER'
+    if ptypes.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def _widen_type(declared: str, observed: str) -> str:
+    """
+    Return a SQLite column type that holds values of both types
+    """
+    if declared == observed:
+        return declared
+    if {declared, observed} == {'INTEGER', 'REAL'}:
+        return 'REAL'
+    return 'TEXT'
+
+def _quote_column(column: str) -> str:
+    """
+    Quote a column name for use in DDL, matching pandas.to_sql quoting
+    """
+    return '"' + str(column).replace('"', '""') + '"'
+
+def _sample_records(df: pd.DataFrame, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Return the first rows of df as records with NULLs as None
+    """
+    head = df.head(limit)
+    return head.astype(object).where(head.notna(), None).to_dict(orient='records')
+
+def _as_sqlite_text(value: Any) -> str:
+    """
+    Render a value the way SQLite stores it in a TEXT column
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, float):
+        # SQLite renders REAL as %!.15g, which always keeps a decimal point
+        text = '%.15g' % value
+        if '.' not in text:
+            mantissa, e, exponent = text.partition('e')
+            text = f"{mantissa}.0{e}{exponent}"
+        return text
+    return str(value)
+
+def _coerce_records(records: List[Dict[str, Any]], schema: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Convert sample values in TEXT and REAL columns to what SQLite stored, so
+    the preview matches what a query on the table returns
+    """
+    converters = {'TEXT': _as_sqlite_text, 'REAL': float}
+    columns = [
+        (col, converters[col_type]) for col, col_type in schema.items()
+        if col_type in converters
+    ]
+    for record in records:
+        for col, convert in columns:
+            if record[col] is not None:
+                record[col] = convert(record[col])
+    return records
+
+def _open_bulk_conn(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection for uploads. WAL with synchronous=NORMAL
+    avoids an fsync per commit while keeping the database consistent.
+    Transactions are managed explicitly.
+    """
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def _db_file_id(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Identify the file at path by device and inode, or None if it is missing
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+def _get_conn() -> sqlite3.Connection:
+    """
+    Return this thread's upload connection, opening it on first use so
+    connection setup is paid once per thread, not per upload. The
+    connection is reopened if the database file was deleted or replaced,
+    so uploads never go to a file other modules no longer read.
+    """
+    conn = getattr(_conn_local, 'conn', None)
+    if conn is not None and _db_file_id(_DATABASE_PATH) != _conn_local.file_id:
+        conn.close()
+        conn = None
+    if conn is None:
+        conn = _open_bulk_conn(_DATABASE_PATH)
+        _conn_local.conn = conn
+        _conn_local.file_id = _db_file_id(_DATABASE_PATH)
+    return conn
+
+def _apply_bulk_pragmas(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Enlarge the page cache and mmap and keep temp storage in memory for a
+    bulk load. Returns the previous values for _restore_pragmas. If a PRAGMA
+    fails, the ones already applied are restored before re-raising.
+    """
+    previous = {}
+    try:
+        for name, value in _BULK_PRAGMAS.items():
+            # In-memory databases report no mmap_size, so there is nothing to restore
+            row = conn.execute(f"PRAGMA {name}").fetchone()
+            if row is not None:
+                previous[name] = row[0]
+            conn.execute(f"PRAGMA {name}={value}")
+    except Exception:
+        _restore_pragmas(conn, previous)
+        raise
+    return previous
+
+def _restore_pragmas(conn: sqlite3.Connection, previous: Dict[str, Any]) -> None:
+    """
+    Restore PRAGMAs saved by _apply_bulk_pragmas and release the memory
+    the bulk load's page cache held
+    """
+    for name, value in previous.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    conn.execute("PRAGMA shrink_memory")
+
+def _rebuild_table(conn: sqlite3.Connection, table_name: str, schema: Dict[str, str]) -> None:
+    """
+    Recreate table_name with new column types, copying its rows across.
+    SQLite cannot change a column's type in place.
+    """
+    staging_name = f"{table_name}_rebuild"
+    identifiers = {'table': table_name, 'staging': staging_name}
+    columns_sql = ", ".join(
+        f"{_quote_column(col)} {col_type}" for col, col_type in schema.items()
+    )
+    for query in (
+        "DROP TABLE IF EXISTS {staging}",
+        f"CREATE TABLE {{staging}} ({columns_sql})",
+        "INSERT INTO {staging} SELECT * FROM {table}",
+        "DROP TABLE {table}",
+        "ALTER TABLE {staging} RENAME TO {table}",
+    ):
+        execute_query_safely(conn, query, identifier_params=identifiers, allow_ddl=True)
+
+def _write_dataframes(
+    conn: sqlite3.Connection,
+    frames: Iterable[pd.DataFrame],
+    table_name: str
+) -> Tuple[Dict[str, str], int, List[Dict[str, Any]]]:
+    """
+    Replace table_name with the rows of frames using a single transaction
+    and one batched executemany insert per frame instead of pandas.to_sql.
+    Column names are cleaned and the table is created from the first frame.
+    If a later frame infers a different type for a column, the column is
+    widened (INTEGER to REAL, anything else to TEXT) and the table rebuilt.
+    Returns the table schema as a column name to SQLite type mapping,
+    the number of rows written and up to five sample records.
+    """
+    schema = {}
+    row_count = 0
+    sample_data = []
+    insert_sql = None
+    previous_pragmas = _apply_bulk_pragmas(conn)
+    
+    try:
+        conn.execute("BEGIN")
+        for df in frames:
+            df.columns = _clean_column_names(df.columns)
+            
+            if insert_sql is None:
+                # Build the DDL from the frame itself so duplicate column names
+                # surface as a CREATE TABLE error instead of being merged
+                columns_sql = ", ".join(
+                    f"{_quote_column(col)} {_sqlite_type(dtype)}"
+                    for col, dtype in df.dtypes.items()
+                )
+                schema = {col: _sqlite_type(dtype) for col, dtype in df.dtypes.items()}
+                execute_query_safely(
+                    conn,
+                    "DROP TABLE IF EXISTS {table}",
+                    identifier_params={'table': table_name},
+                    allow_ddl=True
+                )
+                execute_query_safely(
+                    conn,
+                    f"CREATE TABLE {{table}} ({columns_sql})",
+                    identifier_params={'table': table_name},
+                    allow_ddl=True
+                )
+                placeholders = ", ".join("?" * len(df.columns))
+                insert_sql = f"INSERT INTO {escape_identifier(table_name)} VALUES ({placeholders})"
+            else:
+                widened = {
+                    col: _widen_type(schema[col], _sqlite_type(dtype))
+                    for col, dtype in df.dtypes.items()
+                }
+                if widened != schema:
+                    schema = widened
+                    _rebuild_table(conn, table_name, schema)
+            
+            # itertuples yields native Python scalars one row at a time; SQLite
+            # stores float NaN as NULL, so missing values need no conversion
+            conn.executemany(insert_sql, df.itertuples(index=False, name=None))
+            
+            row_count += len(df)
+            if len(sample_data) < 5:
+                sample_data.extend(_sample_records(df, 5 - len(sample_data)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _restore_pragmas(conn, previous_pragmas)
+    
+    return schema, row_count, _coerce_records(sample_data, schema)
+
 def convert_csv_to_sqlite(csv_content: bytes, table_name: str) -> Dict[str, Any]:
     """
     Convert CSV file content to SQLite table
@@ -47,50 +333,16 @@ def convert_csv_to_sqlite(csv_content: bytes, table_name: str) -> Dict[str, Any]
         # Sanitize table name
         table_name = sanitize_table_name(table_name)
         
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv(io.BytesIO(csv_content))
-        
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
-        
-        # Connect to SQLite database
-        conn = sqlite3.connect("db/database.db")
-        
-        # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
+        # Stream CSV into pandas DataFrame chunks
+        chunks = _iter_csv_chunks(csv_content)
         
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
+        # Get the shared SQLite connection
+        conn = _get_conn()
         
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
-        
-        conn.close()
+        # Write DataFrame chunks to SQLite
+        schema, row_count, sample_data = _write_dataframes(conn, chunks, table_name)
         
+        # Summarize from the DataFrames rather than querying the table back
         return {
             'table_name': table_name,
             'schema': schema,
@@ -110,7 +362,7 @@ def convert_json_to_sqlite(json_content: bytes, table_name: str) -> Dict[str, An
         table_name = sanitize_table_name(table_name)
         
         # Parse JSON
-        data = json.loads(json_content.decode('utf-8'))
+        data = _loads_json(json_content)
         
         # Ensure it's a list of objects
         if not isinstance(data, list):
@@ -122,47 +374,13 @@ def convert_json_to_sqlite(json_content: bytes, table_name: str) -> Dict[str, An
         # Convert to pandas DataFrame
         df = pd.DataFrame(data)
         
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
-        
-        # Connect to SQLite database
-        conn = sqlite3.connect("db/database.db")
+        # Get the shared SQLite connection
+        conn = _get_conn()
         
         # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
-        
-        conn.close()
+        schema, row_count, sample_data = _write_dataframes(conn, [df], table_name)
         
+        # Summarize from the DataFrame rather than querying the table back
         return {
             'table_name': table_name,
             'schema': schema,
@@ -4,6 +4,7 @@ import pandas as pd
 import sqlite3
 import os
 import io
+import threading
 from pathlib import Path
 from unittest.mock import patch
 from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite
@@ -15,8 +16,10 @@ def test_db():
     # Create in-memory database
     conn = sqlite3.connect(':memory:')
     
-    # Patch the database connection to use our in-memory database
-    with patch('core.file_processor.sqlite3.connect') as mock_connect:
+    # Patch the database connection to use our in-memory database and
+    # start each test without a cached connection
+    with patch('core.file_processor.sqlite3.connect') as mock_connect, \
+         patch('core.file_processor._conn_local', threading.local()):
         mock_connect.return_value = conn
         yield conn
     
@@ -86,6 +89,56 @@ class TestFileProcessor:
         assert sample['full_name'] == 'John Doe'
         assert sample['birth_date'] == '1990-01-15'
     
+    def test_convert_csv_to_sqlite_irregular_values(self, test_db):
+        # Short rows are padded with NULL and oversized integers are kept as text
+        csv_data = b"a,b,c\n1,2,123456789012345678901234567890\n4,5"
+        
+        result = convert_csv_to_sqlite(csv_data, "irregular")
+        
+        assert result['row_count'] == 2
+        rows = test_db.execute("SELECT a, b, c FROM irregular ORDER BY a").fetchall()
+        assert rows == [(1, 2, '123456789012345678901234567890'), (4, 5, None)]
+    
+    def test_convert_csv_to_sqlite_in_chunks(self, test_db):
+        # Large files are written chunk by chunk into a single table
+        csv_data = b"id,name\n" + b"".join(b"%d,user_%d\n" % (i, i) for i in range(12))
+        
+        with patch('core.file_processor._CSV_CHUNK_ROWS', 5):
+            result = convert_csv_to_sqlite(csv_data, "chunked")
+        
+        assert result['row_count'] == 12
+        assert result['schema'] == {'id': 'INTEGER', 'name': 'TEXT'}
+        assert [row['id'] for row in result['sample_data']] == [0, 1, 2, 3, 4]
+    
+    def test_convert_csv_to_sqlite_type_drift_across_chunks(self, test_db):
+        # Columns whose type changes in a later chunk are widened like a whole-file read
+        rows = [b"%d,%d,,%d" % (i, 10000 + i, i) for i in range(8)]
+        rows.append(b"8,ABC,hello,8.5")
+        csv_data = b"id,zip,note,score\n" + b"\n".join(rows) + b"\n"
+        
+        with patch('core.file_processor._CSV_CHUNK_ROWS', 3):
+            result = convert_csv_to_sqlite(csv_data, "addresses")
+        
+        expected_schema = {'id': 'INTEGER', 'zip': 'TEXT', 'note': 'TEXT', 'score': 'REAL'}
+        assert result['row_count'] == 9
+        assert result['schema'] == expected_schema
+        assert result['sample_data'][0] == {'id': 0, 'zip': '10000', 'note': None, 'score': 0.0}
+        
+        columns = test_db.execute("PRAGMA table_info(addresses)").fetchall()
+        assert {col[1]: col[2] for col in columns} == expected_schema
+        rows = test_db.execute("SELECT zip, note, score FROM addresses ORDER BY id").fetchall()
+        assert rows[0] == ('10000', None, 0.0)
+        assert rows[-1] == ('ABC', 'hello', 8.5)
+        tables = test_db.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        assert tables == [('addresses',)]
+    
+    def test_convert_csv_to_sqlite_duplicate_cleaned_columns(self, test_db):
+        # Columns that clean to the same name are reported as duplicates
+        with pytest.raises(Exception) as exc_info:
+            convert_csv_to_sqlite(b"A b,a-b\n1,2", "dupes")
+        
+        assert "duplicate column name: a_b" in str(exc_info.value)
+    
     def test_convert_csv_to_sqlite_with_inconsistent_data(self, test_db, test_assets_dir):
         # Test with CSV that has inconsistent row lengths - should raise error
         csv_file = test_assets_dir / "invalid.csv"
@@ -100,6 +153,23 @@ class TestFileProcessor:
         
         assert "Error converting CSV to SQLite" in str(exc_info.value)
     
+    def test_convert_csv_to_sqlite_replaces_existing_table(self, test_db):
+        # Uploading over an existing table replaces it and stores missing values as NULL
+        test_db.execute("CREATE TABLE scores (old_column TEXT)")
+        test_db.execute("INSERT INTO scores VALUES ('stale')")
+        test_db.commit()
+        
+        result = convert_csv_to_sqlite(b"name,score\nDave,\nEve,4.0", "scores")
+        
+        assert result['row_count'] == 2
+        assert result['schema'] == {'name': 'TEXT', 'score': 'REAL'}
+        assert result['sample_data'] == [
+            {'name': 'Dave', 'score': None},
+            {'name': 'Eve', 'score': 4.0}
+        ]
+        rows = test_db.execute("SELECT name, score FROM scores ORDER BY name").fetchall()
+        assert rows == [('Dave', None), ('Eve', 4.0)]
+    
     def test_convert_json_to_sqlite_success(self, test_db, test_assets_dir):
         # Load real JSON file
         json_file = test_assets_dir / "test_products.json"
@@ -133,6 +203,87 @@ class TestFileProcessor:
         assert laptop_data['category'] == 'Electronics'
         assert laptop_data['in_stock'] == True
     
+    def test_convert_json_to_sqlite_without_orjson(self, test_db, test_assets_dir):
+        # Falls back to the stdlib json parser when orjson is unavailable
+        json_file = test_assets_dir / "test_products.json"
+        with open(json_file, 'rb') as f:
+            json_data = f.read()
+        
+        with patch('core.file_processor.orjson', None):
+            result = convert_json_to_sqlite(json_data, "products")
+        
+        assert result['row_count'] == 3
+        assert 'price' in result['schema']
+    
+    def test_connection_reused_across_uploads(self, test_db):
+        # Consecutive uploads on one thread share a single connection
+        convert_csv_to_sqlite(b"name,age\nAlice,30", "first")
+        convert_json_to_sqlite(b'[{"name": "Bob"}]', "second")
+        
+        with patch('core.file_processor.sqlite3.connect') as mock_connect:
+            convert_csv_to_sqlite(b"name,age\nCarol,41", "third")
+            mock_connect.assert_not_called()
+        
+        tables = test_db.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
+        ).fetchall()
+        assert tables == [('first',), ('second',), ('third',)]
+    
+    def test_convert_json_to_sqlite_mixed_types(self, test_db):
+        # Sample values match what SQLite stored in a TEXT column
+        result = convert_json_to_sqlite(b'[{"a": 1}, {"a": "x"}, {"a": 2.5}, {"a": null}]', "mixed")
+        
+        assert result['schema'] == {'a': 'TEXT'}
+        assert [row['a'] for row in result['sample_data']] == ['1', 'x', '2.5', None]
+        rows = test_db.execute("SELECT a FROM mixed").fetchall()
+        assert [row[0] for row in rows] == ['1', 'x', '2.5', None]
+    
+    def test_convert_json_to_sqlite_with_nan(self, test_db):
+        # NaN is rejected by orjson but accepted by json, and stored as NULL
+        json_data = b'[{"name": "Widget", "price": NaN}, {"name": "Gadget", "price": 2.5}]'
+        
+        result = convert_json_to_sqlite(json_data, "products")
+        
+        assert result['row_count'] == 2
+        assert result['sample_data'][0]['price'] is None
+    
+    def test_connection_on_database_file(self, tmp_path, monkeypatch):
+        # Exercise the real connection: autocommit, bulk PRAGMAs restored after
+        # the load, and reopened when the database file is replaced
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "db").mkdir()
+        
+        with patch('core.file_processor._conn_local', threading.local()) as conn_local:
+            convert_csv_to_sqlite(b"name,age\nAlice,30", "people")
+            conn = conn_local.conn
+            
+            reader = sqlite3.connect("db/database.db")
+            assert conn.isolation_level is None
+            assert conn.execute("PRAGMA cache_size").fetchone() == \
+                reader.execute("PRAGMA cache_size").fetchone()
+            assert reader.execute("SELECT name, age FROM people").fetchall() == [('Alice', 30)]
+            reader.close()
+            
+            os.remove("db/database.db")
+            convert_csv_to_sqlite(b"name,age\nBob,41", "people")
+            assert conn_local.conn is not conn
+            
+            reader = sqlite3.connect("db/database.db")
+            assert reader.execute("SELECT name, age FROM people").fetchall() == [('Bob', 41)]
+            reader.close()
+            conn_local.conn.close()
+    
+    def test_bulk_pragmas_restored_when_one_fails(self, test_db):
+        # A failing bulk PRAGMA leaves the ones already applied restored
+        original_cache_size = test_db.execute("PRAGMA cache_size").fetchone()[0]
+        bulk_pragmas = {'cache_size': -262144, 'not_a_pragma': "'"}
+        
+        with patch('core.file_processor._BULK_PRAGMAS', bulk_pragmas):
+            with pytest.raises(Exception):
+                convert_csv_to_sqlite(b"name,age\nAlice,30", "people")
+        
+        assert test_db.execute("PRAGMA cache_size").fetchone()[0] == original_cache_size
+    
     def test_convert_json_to_sqlite_invalid_json(self):
         # Test with invalid JSON
         json_data = b'invalid json'